@@ -4,102 +4,307 @@ config_generator.py - Python 配置生成辅助脚本
 用于处理复杂的配置生成、JSON 处理和 API 调用等任务
 """
 
+import bisect
+import copy
+import functools
 import json
 import os
+import re
 import sys
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import subprocess
+from string import Template
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
+
+# 可选依赖：安装了 orjson 时用其序列化 JSON，否则回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# 设置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-class ConfigGenerator:
-    """配置生成器类"""
-    
-    def __init__(self, work_dir: str, comfyui_dir: str):
-        self.work_dir = Path(work_dir)
-        self.comfyui_dir = Path(comfyui_dir)
-        self.gpu_memory_gb = self._get_gpu_memory()
-        
-    def _get_gpu_memory(self) -> int:
-        """获取 GPU 内存大小"""
+def _ensure_logging():
+    """设置日志（仅在 CLI 入口调用，导入模块时不配置根 logger）"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def _json_default(obj: Any) -> Any:
+    """JSON 序列化时将只读视图转换为 dict"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _render_frozen(template: Any, params: Mapping[str, str]) -> Any:
+    """按模板生成深度只读的配置：dict 转为只读视图，list 转为元组，字符串填入占位符"""
+    if isinstance(template, dict):
+        return MappingProxyType({key: _render_frozen(value, params) for key, value in template.items()})
+    if isinstance(template, list):
+        return tuple(_render_frozen(value, params) for value in template)
+    if isinstance(template, str):
+        return template.format_map(params)
+    return template
+
+def _dumps_json(config: Mapping[str, Any]) -> bytes:
+    """序列化为缩进 2 格的 UTF-8 JSON 字节"""
+    if orjson is not None:
+        return orjson.dumps(
+            config, default=_json_default,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(config, indent=2, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+def _render_ini(config: Mapping[str, Any]) -> str:
+    """渲染简单的 INI 格式文本"""
+    lines = []
+    for section, values in config.items():
+        lines.append(f"[{section}]")
+        if isinstance(values, Mapping):
+            lines.extend(f"{key} = {value}" for key, value in values.items())
+        lines.append("")
+    lines.append("")
+    return "\n".join(lines)
+
+@functools.lru_cache(maxsize=1)
+def _query_gpu_memory_gb() -> int:
+    """获取 GPU 内存大小（进程内只查询一次）"""
+    # 环境变量显式指定时不再探测 GPU（如无 GPU 的镜像构建环境）
+    override = os.environ.get("GPU_MEMORY_GB")
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            logger.warning(f"GPU_MEMORY_GB 无效: {override!r}，忽略")
+    if os.environ.get("CUDA_VISIBLE_DEVICES") == "":
+        return 8
+
+    # 优先直接调用 NVML，避免 fork nvidia-smi 进程
+    try:
+        import pynvml
+    except ImportError:
+        pynvml = None
+
+    if pynvml is not None:
+        try:
+            pynvml.nvmlInit()
+            try:
+                handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+                return pynvml.nvmlDeviceGetMemoryInfo(handle).total >> 30  # 转换为 GB
+            finally:
+                pynvml.nvmlShutdown()
+        except pynvml.NVMLError:
+            logger.debug("NVML 不可用，回退到 nvidia-smi")
+
+    import shutil
+    import subprocess
+
+    # 使用绝对路径并保留 close_fds=False，使 subprocess 走 posix_spawn 快速路径而非 fork+exec；
+    # Python 创建的 fd 默认不可继承，因此不会泄漏到子进程
+    nvidia_smi = shutil.which('nvidia-smi')
+    if nvidia_smi is None:
+        logger.warning("无法获取 GPU 内存信息，使用默认值")
+        return 8
+
+    # 输出只有一行数字，直接写入匿名管道并用 os.read 读取，省去 capture_output 的缓冲封装
+    read_fd, write_fd = os.pipe()
+    try:
         try:
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=memory.total', '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, check=True
+            subprocess.run(
+                [nvidia_smi, '-i', '0', '--query-gpu=memory.total', '--format=csv,noheader,nounits'],
+                stdout=write_fd, stderr=subprocess.DEVNULL, check=True, timeout=2, close_fds=False
             )
-            return int(result.stdout.strip().split('\n')[0]) // 1024  # 转换为 GB
-        except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
-            logger.warning("无法获取 GPU 内存信息，使用默认值")
-            return 8
-    
-    def generate_supervisor_config(self) -> Dict[str, Any]:
-        """生成 Supervisor 配置"""
-        config = {
-            "unix_http_server": {
-                "file": "/tmp/supervisor.sock",
-                "chmod": "0700"
-            },
-            "supervisord": {
-                "logfile": f"{self.work_dir}/logs/supervisord.log",
-                "logfile_maxbytes": "50MB",
-                "logfile_backups": 10,
-                "loglevel": "info",
-                "pidfile": "/tmp/supervisord.pid",
-                "nodaemon": False,
-                "minfds": 1024,
-                "minprocs": 200
-            },
-            "rpcinterface:supervisor": {
-                "supervisor.rpcinterface_factory": "supervisor.rpcinterface:make_main_rpcinterface"
-            },
-            "supervisorctl": {
-                "serverurl": "unix:///tmp/supervisor.sock"
+        finally:
+            os.close(write_fd)
+        # 直接解析字节输出，省去解码；MiB 转换为 GB
+        return int(os.read(read_fd, 64).split(b'\n', 1)[0]) >> 10
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError, ValueError):
+        logger.warning("无法获取 GPU 内存信息，使用默认值")
+        return 8
+    finally:
+        os.close(read_fd)
+
+# Supervisor 配置模板，{work_dir} / {comfyui_dir} 在生成时替换
+_SUPERVISOR_TEMPLATE = {
+    "unix_http_server": {
+        "file": "/tmp/supervisor.sock",
+        "chmod": "0700"
+    },
+    "supervisord": {
+        "logfile": "{work_dir}/logs/supervisord.log",
+        "logfile_maxbytes": "50MB",
+        "logfile_backups": 10,
+        "loglevel": "info",
+        "pidfile": "/tmp/supervisord.pid",
+        "nodaemon": False,
+        "minfds": 1024,
+        "minprocs": 200
+    },
+    "rpcinterface:supervisor": {
+        "supervisor.rpcinterface_factory": "supervisor.rpcinterface:make_main_rpcinterface"
+    },
+    "supervisorctl": {
+        "serverurl": "unix:///tmp/supervisor.sock"
+    },
+    "program:comfyui": {
+        "command": "{work_dir}/start_comfyui.sh",
+        "directory": "{comfyui_dir}",
+        "autostart": True,
+        "autorestart": True,
+        "stderr_logfile": "{work_dir}/logs/comfyui.error.log",
+        "stdout_logfile": "{work_dir}/logs/comfyui.log",
+        "environment": "PATH=\"{work_dir}/venv/bin:/usr/local/bin:/usr/bin:/bin\""
+    },
+    "program:fastapi": {
+        "command": "{work_dir}/start_fastapi.sh",
+        "directory": "{work_dir}",
+        "autostart": True,
+        "autorestart": True,
+        "stderr_logfile": "{work_dir}/logs/fastapi.error.log",
+        "stdout_logfile": "{work_dir}/logs/fastapi.log",
+        "environment": "PATH=\"{work_dir}/venv/bin:/usr/local/bin:/usr/bin:/bin\""
+    }
+}
+
+# 预渲染的 supervisord.conf 文本，生成时只需替换目录占位符
+_SUPERVISOR_INI_TEMPLATE = _render_ini(_SUPERVISOR_TEMPLATE)
+
+# 基础 ComfyUI 工作流
+_WORKFLOW_BASIC = {
+    "1": {
+        "class_type": "CheckpointLoaderSimple",
+        "inputs": {
+            "ckpt_name": "flux1-dev.safetensors"
+        }
+    },
+    "2": {
+        "class_type": "CLIPTextEncode", 
+        "inputs": {
+            "text": "a beautiful landscape",
+            "clip": ["1", 1]
+        }
+    },
+    "3": {
+        "class_type": "EmptyLatentImage",
+        "inputs": {
+            "width": 1024,
+            "height": 1024,
+            "batch_size": 1
+        }
+    },
+    "4": {
+        "class_type": "KSampler",
+        "inputs": {
+            "seed": 42,
+            "steps": 20,
+            "cfg": 7.0,
+            "sampler_name": "euler",
+            "scheduler": "normal",
+            "denoise": 1.0,
+            "model": ["1", 0],
+            "positive": ["2", 0],
+            "negative": ["5", 0],
+            "latent_image": ["3", 0]
+        }
+    },
+    "5": {
+        "class_type": "CLIPTextEncode",
+        "inputs": {
+            "text": "",
+            "clip": ["1", 1]
+        }
+    },
+    "6": {
+        "class_type": "VAEDecode",
+        "inputs": {
+            "samples": ["4", 0],
+            "vae": ["1", 2]
+        }
+    },
+    "7": {
+        "class_type": "SaveImage",
+        "inputs": {
+            "filename_prefix": "ComfyUI",
+            "images": ["6", 0]
+        }
+    }
+}
+
+_WORKFLOWS = {
+    "basic": _WORKFLOW_BASIC,
+}
+
+# 基础工作流内容固定，导入时预先序列化，保存时直接写入字节
+_WORKFLOW_BASIC_JSON = _dumps_json(_WORKFLOW_BASIC)
+
+# Docker Compose 配置模板，comfyui-service 的 {work_dir} 挂载在生成时替换。
+# 注意：CLI 写出的是 _DOCKER_COMPOSE_YAML_TEMPLATE，修改此处时必须同步修改该 YAML 模板，
+# 两者应满足 yaml.safe_load(generate_docker_compose_yaml()) == generate_docker_compose() 的 JSON 往返结果
+_DOCKER_COMPOSE_TEMPLATE = {
+    "version": "3.8",
+    "services": {
+        "comfyui-service": {
+            "build": {
+                "context": ".",
+                "dockerfile": "Dockerfile"
             },
-            "program:comfyui": {
-                "command": f"{self.work_dir}/start_comfyui.sh",
-                "directory": str(self.comfyui_dir),
-                "autostart": True,
-                "autorestart": True,
-                "stderr_logfile": f"{self.work_dir}/logs/comfyui.error.log",
-                "stdout_logfile": f"{self.work_dir}/logs/comfyui.log",
-                "environment": f"PATH=\"{self.work_dir}/venv/bin:/usr/local/bin:/usr/bin:/bin\""
+            "ports": [
+                "8000:8000",
+                "8188:8188"
+            ],
+            "volumes": [
+                "{work_dir}:/app",
+                "/models:/models",
+                "./logs:/app/logs"
+            ],
+            "environment": [
+                "PYTHONPATH=/app",
+                "CUDA_VISIBLE_DEVICES=0"
+            ],
+            "deploy": {
+                "resources": {
+                    "reservations": {
+                        "devices": [{
+                            "driver": "nvidia",
+                            "count": 1,
+                            "capabilities": ["gpu"]
+                        }]
+                    }
+                }
             },
-            "program:fastapi": {
-                "command": f"{self.work_dir}/start_fastapi.sh",
-                "directory": str(self.work_dir),
-                "autostart": True,
-                "autorestart": True,
-                "stderr_logfile": f"{self.work_dir}/logs/fastapi.error.log",
-                "stdout_logfile": f"{self.work_dir}/logs/fastapi.log",
-                "environment": f"PATH=\"{self.work_dir}/venv/bin:/usr/local/bin:/usr/bin:/bin\""
-            }
+            "restart": "unless-stopped"
+        },
+        "nginx": {
+            "image": "nginx:alpine",
+            "ports": ["80:80", "443:443"],
+            "volumes": [
+                "./nginx/nginx.conf:/etc/nginx/nginx.conf",
+                "./nginx/sites-available:/etc/nginx/sites-available",
+                "./nginx/ssl:/etc/nginx/ssl"
+            ],
+            "depends_on": ["comfyui-service"],
+            "restart": "unless-stopped"
         }
-        return config
-    
-    def generate_nginx_config(self, domain: Optional[str] = None) -> str:
-        """生成 Nginx 配置"""
-        server_name = domain if domain else "_"
-        
-        config = f"""
-server {{
+    }
+}
+
+# Nginx 站点配置模板，仅 ${domain} 随参数变化；其余 $ 变量为 nginx 自身变量，
+# 由 safe_substitute 原样保留，模板内无需转义花括号
+_NGINX_TEMPLATE = Template("""\
+server {
     listen 80;
-    server_name {server_name};
+    server_name ${domain};
     
     # 静态文件缓存
-    location ~* \\.(jpg|jpeg|png|gif|ico|css|js)$ {{
+    location ~* \\.(jpg|jpeg|png|gif|ico|css|js)$ {
         expires 1y;
         add_header Cache-Control "public, immutable";
-    }}
+    }
     
     # FastAPI 代理
-    location /api/ {{
+    location /api/ {
         proxy_pass http://localhost:8000/;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
@@ -115,10 +320,10 @@ server {{
         proxy_connect_timeout 60s;
         proxy_send_timeout 60s;
         proxy_read_timeout 60s;
-    }}
+    }
     
     # ComfyUI 代理
-    location /comfyui/ {{
+    location /comfyui/ {
         proxy_pass http://localhost:8188/;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
@@ -137,10 +342,10 @@ server {{
         proxy_connect_timeout 300s;
         proxy_send_timeout 300s;
         proxy_read_timeout 300s;
-    }}
+    }
     
     # WebSocket 直接代理
-    location /ws {{
+    location /ws {
         proxy_pass http://localhost:8188/ws;
         proxy_http_version 1.1;
         proxy_set_header Upgrade $http_upgrade;
@@ -153,243 +358,268 @@ server {{
         # WebSocket 特定设置
         proxy_buffering off;
         proxy_cache off;
-    }}
+    }
     
     # 默认代理到 FastAPI
-    location / {{
+    location / {
         proxy_pass http://localhost:8000/;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
         proxy_set_header X-Forwarded-Proto $scheme;
-    }}
-}}
+    }
+}""")
+
+# 可以安全写成 YAML 普通标量的路径：不以指示符开头，不含 ": " / " #"，首尾无空白
+_YAML_PLAIN_SAFE = re.compile(r"[\w./~][\w./~@+=,:\- ]*")
+
+def _yaml_scalar(value: str) -> str:
+    """将字符串渲染为 YAML 标量，必要时使用双引号（JSON 字符串也是合法的 YAML）"""
+    if (_YAML_PLAIN_SAFE.fullmatch(value)
+            and ": " not in value and " #" not in value
+            and not value.endswith((" ", ":"))):
+        return value
+    return json.dumps(value)
+
+# 与 yaml.dump(_DOCKER_COMPOSE_TEMPLATE, default_flow_style=False) 输出一致的预渲染模板，
+# 省去运行时加载 PyYAML 和纯 Python 的序列化开销。
+# 注意：修改 _DOCKER_COMPOSE_TEMPLATE 时必须同步修改本模板，反之亦然
+_DOCKER_COMPOSE_YAML_TEMPLATE = """\
+services:
+  comfyui-service:
+    build:
+      context: .
+      dockerfile: Dockerfile
+    deploy:
+      resources:
+        reservations:
+          devices:
+          - capabilities:
+            - gpu
+            count: 1
+            driver: nvidia
+    environment:
+    - PYTHONPATH=/app
+    - CUDA_VISIBLE_DEVICES=0
+    ports:
+    - 8000:8000
+    - 8188:8188
+    restart: unless-stopped
+    volumes:
+    - {work_volume}
+    - /models:/models
+    - ./logs:/app/logs
+  nginx:
+    depends_on:
+    - comfyui-service
+    image: nginx:alpine
+    ports:
+    - 80:80
+    - 443:443
+    restart: unless-stopped
+    volumes:
+    - ./nginx/nginx.conf:/etc/nginx/nginx.conf
+    - ./nginx/sites-available:/etc/nginx/sites-available
+    - ./nginx/ssl:/etc/nginx/ssl
+version: '3.8'
 """
-        return config.strip()
+
+# GPU 内存分档（GB，升序），与 _GPU_TIER_CONFIGS 一一对应：<12 / 12-24 / >=24
+# 各档配置为只读视图，可直接返回给调用方
+_GPU_MEMORY_TIERS = (12, 24)
+_GPU_TIER_CONFIGS = (
+    MappingProxyType({
+        "memory_management": "low_memory",
+        "batch_size": 1,
+        "attention_mode": "low_mem_attention",
+        "model_precision": "fp16",
+        "cache_models": False,
+        "memory_fraction": 0.7,
+        "enable_sequential_cpu_offload": True
+    }),
+    MappingProxyType({
+        "memory_management": "medium_memory",
+        "batch_size": 2,
+        "attention_mode": "efficient_attention",
+        "model_precision": "fp16",
+        "cache_models": True,
+        "memory_fraction": 0.8
+    }),
+    MappingProxyType({
+        "memory_management": "high_memory",
+        "batch_size": 4,
+        "attention_mode": "flash_attention",
+        "model_precision": "fp16",
+        "cache_models": True,
+        "memory_fraction": 0.9
+    }),
+)
+
+# main() 支持的配置类型
+_CONFIG_TYPES = ("supervisor", "nginx", "docker", "workflow", "optimization")
+
+class ConfigGenerator:
+    """配置生成器类"""
+    
+    def __init__(self, work_dir: str, comfyui_dir: str):
+        self.work_dir = Path(work_dir)
+        self.comfyui_dir = Path(comfyui_dir)
+        # 模板渲染时直接使用字符串形式，避免重复的 Path -> str 转换
+        self._work_dir_s = os.fspath(self.work_dir)
+        self._comfyui_dir_s = os.fspath(self.comfyui_dir)
+        self.gpu_memory_gb = _query_gpu_memory_gb()
+        
+    # 依赖目录的配置在首次使用时构建，之后每个实例返回同一个只读对象
+    @functools.cached_property
+    def _supervisor_cfg(self) -> Mapping[str, Any]:
+        """根据模板构建 Supervisor 配置"""
+        return _render_frozen(_SUPERVISOR_TEMPLATE, self._template_params())
+    
+    @functools.cached_property
+    def _docker_compose_cfg(self) -> Mapping[str, Any]:
+        """根据模板构建 Docker Compose 配置"""
+        return _render_frozen(_DOCKER_COMPOSE_TEMPLATE, self._template_params())
+    
+    def _template_params(self) -> Dict[str, str]:
+        """模板占位符参数"""
+        return {"work_dir": self._work_dir_s, "comfyui_dir": self._comfyui_dir_s}
+    
+    def generate_supervisor_config(self) -> Mapping[str, Any]:
+        """生成 Supervisor 配置（深度只读，嵌套的段落同为只读视图）"""
+        return self._supervisor_cfg
+    
+    def generate_supervisor_ini(self) -> str:
+        """生成 Supervisor 配置（INI 文本）"""
+        return _SUPERVISOR_INI_TEMPLATE.format(
+            work_dir=self._work_dir_s, comfyui_dir=self._comfyui_dir_s
+        )
+    
+    def generate_nginx_config(self, domain: Optional[str] = None) -> str:
+        """生成 Nginx 配置"""
+        return _NGINX_TEMPLATE.safe_substitute(domain=domain or "_")
     
     def generate_comfyui_workflow(self, workflow_type: str = "basic") -> Dict[str, Any]:
         """生成 ComfyUI 工作流配置"""
-        workflows = {
-            "basic": {
-                "1": {
-                    "class_type": "CheckpointLoaderSimple",
-                    "inputs": {
-                        "ckpt_name": "flux1-dev.safetensors"
-                    }
-                },
-                "2": {
-                    "class_type": "CLIPTextEncode", 
-                    "inputs": {
-                        "text": "a beautiful landscape",
-                        "clip": ["1", 1]
-                    }
-                },
-                "3": {
-                    "class_type": "EmptyLatentImage",
-                    "inputs": {
-                        "width": 1024,
-                        "height": 1024,
-                        "batch_size": 1
-                    }
-                },
-                "4": {
-                    "class_type": "KSampler",
-                    "inputs": {
-                        "seed": 42,
-                        "steps": 20,
-                        "cfg": 7.0,
-                        "sampler_name": "euler",
-                        "scheduler": "normal",
-                        "denoise": 1.0,
-                        "model": ["1", 0],
-                        "positive": ["2", 0],
-                        "negative": ["5", 0],
-                        "latent_image": ["3", 0]
-                    }
-                },
-                "5": {
-                    "class_type": "CLIPTextEncode",
-                    "inputs": {
-                        "text": "",
-                        "clip": ["1", 1]
-                    }
-                },
-                "6": {
-                    "class_type": "VAEDecode",
-                    "inputs": {
-                        "samples": ["4", 0],
-                        "vae": ["1", 2]
-                    }
-                },
-                "7": {
-                    "class_type": "SaveImage",
-                    "inputs": {
-                        "filename_prefix": "ComfyUI",
-                        "images": ["6", 0]
-                    }
-                }
-            }
-        }
-        return workflows.get(workflow_type, workflows["basic"])
+        return copy.deepcopy(_WORKFLOWS.get(workflow_type, _WORKFLOW_BASIC))
     
-    def generate_docker_compose(self) -> Dict[str, Any]:
-        """生成 Docker Compose 配置"""
-        config = {
-            "version": "3.8",
-            "services": {
-                "comfyui-service": {
-                    "build": {
-                        "context": ".",
-                        "dockerfile": "Dockerfile"
-                    },
-                    "ports": [
-                        "8000:8000",
-                        "8188:8188"
-                    ],
-                    "volumes": [
-                        f"{self.work_dir}:/app",
-                        "/models:/models",
-                        "./logs:/app/logs"
-                    ],
-                    "environment": [
-                        "PYTHONPATH=/app",
-                        "CUDA_VISIBLE_DEVICES=0"
-                    ],
-                    "deploy": {
-                        "resources": {
-                            "reservations": {
-                                "devices": [{
-                                    "driver": "nvidia",
-                                    "count": 1,
-                                    "capabilities": ["gpu"]
-                                }]
-                            }
-                        }
-                    },
-                    "restart": "unless-stopped"
-                },
-                "nginx": {
-                    "image": "nginx:alpine",
-                    "ports": ["80:80", "443:443"],
-                    "volumes": [
-                        "./nginx/nginx.conf:/etc/nginx/nginx.conf",
-                        "./nginx/sites-available:/etc/nginx/sites-available",
-                        "./nginx/ssl:/etc/nginx/ssl"
-                    ],
-                    "depends_on": ["comfyui-service"],
-                    "restart": "unless-stopped"
-                }
-            }
-        }
-        return config
+    def generate_workflow_json_bytes(self, workflow_type: str = "basic") -> bytes:
+        """生成 ComfyUI 工作流配置（序列化后的 JSON 字节）"""
+        workflow = _WORKFLOWS.get(workflow_type, _WORKFLOW_BASIC)
+        if workflow is _WORKFLOW_BASIC:
+            return _WORKFLOW_BASIC_JSON
+        return _dumps_json(workflow)
     
-    def optimize_for_gpu_memory(self) -> Dict[str, Any]:
-        """根据 GPU 内存生成优化配置"""
-        if self.gpu_memory_gb >= 24:
-            return {
-                "memory_management": "high_memory",
-                "batch_size": 4,
-                "attention_mode": "flash_attention",
-                "model_precision": "fp16",
-                "cache_models": True,
-                "memory_fraction": 0.9
-            }
-        elif self.gpu_memory_gb >= 12:
-            return {
-                "memory_management": "medium_memory", 
-                "batch_size": 2,
-                "attention_mode": "efficient_attention",
-                "model_precision": "fp16",
-                "cache_models": True,
-                "memory_fraction": 0.8
-            }
-        else:
-            return {
-                "memory_management": "low_memory",
-                "batch_size": 1,
-                "attention_mode": "low_mem_attention",
-                "model_precision": "fp16",
-                "cache_models": False,
-                "memory_fraction": 0.7,
-                "enable_sequential_cpu_offload": True
-            }
+    def generate_docker_compose(self) -> Mapping[str, Any]:
+        """生成 Docker Compose 配置（深度只读，嵌套的字典为只读视图、列表为元组）"""
+        return self._docker_compose_cfg
     
-    def save_config(self, config: Dict[str, Any], filename: str, format_type: str = "json"):
+    def generate_docker_compose_yaml(self) -> str:
+        """生成 Docker Compose 配置（YAML 文本）"""
+        return _DOCKER_COMPOSE_YAML_TEMPLATE.format(
+            work_volume=_yaml_scalar(f"{self._work_dir_s}:/app")
+        )
+    
+    def optimize_for_gpu_memory(self) -> Mapping[str, Any]:
+        """根据 GPU 内存生成优化配置（只读视图）"""
+        tier = bisect.bisect_right(_GPU_MEMORY_TIERS, self.gpu_memory_gb)
+        return _GPU_TIER_CONFIGS[tier]
+    
+    def save_config(self, config: Mapping[str, Any], filename: str, format_type: str = "json"):
         """保存配置到文件"""
         filepath = self.work_dir / filename
         
         try:
             if format_type == "json":
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=2, ensure_ascii=False)
+                filepath.write_bytes(_dumps_json(config))
             elif format_type == "ini":
-                # 简单的 INI 格式写入
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    for section, values in config.items():
-                        f.write(f"[{section}]\n")
-                        if isinstance(values, dict):
-                            for key, value in values.items():
-                                f.write(f"{key} = {value}\n")
-                        f.write("\n")
+                # 简单的 INI 格式写入，先拼接完整内容再一次性写入
+                filepath.write_text(_render_ini(config), encoding='utf-8')
             elif format_type == "text":
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(str(config))
+                filepath.write_text(str(config), encoding='utf-8')
             
             logger.info(f"配置已保存: {filepath}")
             return True
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
             return False
+    
+    def save_bytes(self, blob: bytes, filename: str):
+        """将已序列化的内容直接写入文件"""
+        filepath = self.work_dir / filename
+        
+        try:
+            filepath.write_bytes(blob)
+            logger.info(f"配置已保存: {filepath}")
+            return True
+        except Exception as e:
+            logger.error(f"保存配置失败: {e}")
+            return False
 
 def main():
     """主函数"""
     import argparse
     
+    _ensure_logging()
+    
     parser = argparse.ArgumentParser(description="生成配置文件")
     parser.add_argument("--work-dir", default="/my-hybrid-service", help="工作目录")
     parser.add_argument("--comfyui-dir", default="/workspace/ComfyUI", help="ComfyUI目录")
-    parser.add_argument("--config-type", required=True, 
-                       choices=["supervisor", "nginx", "docker", "workflow", "optimization"],
-                       help="配置类型")
-    parser.add_argument("--output", help="输出文件名")
+    parser.add_argument("--config-type", required=True, nargs="+",
+                       choices=[*_CONFIG_TYPES, "all"],
+                       help="配置类型，可指定多个；all 表示生成全部")
+    parser.add_argument("--output", help="输出文件名（仅在指定单个配置类型时可用）")
     parser.add_argument("--domain", help="域名（仅用于nginx配置）")
     parser.add_argument("--workflow-type", default="basic", help="工作流类型")
     
     args = parser.parse_args()
     
+    # 一次运行生成多个配置，共享同一个生成器，避免重复启动解释器和查询 GPU
+    if "all" in args.config_type:
+        config_types = list(_CONFIG_TYPES)
+    else:
+        config_types = list(dict.fromkeys(args.config_type))
+    if args.output and len(config_types) > 1:
+        parser.error("--output 只能与单个 --config-type 一起使用")
+    
     # 创建配置生成器
     generator = ConfigGenerator(args.work_dir, args.comfyui_dir)
     
-    # 根据类型生成配置
-    if args.config_type == "supervisor":
-        config = generator.generate_supervisor_config()
-        output_file = args.output or "supervisord.conf"
-        generator.save_config(config, output_file, "ini")
-        
-    elif args.config_type == "nginx":
-        config_text = generator.generate_nginx_config(args.domain)
-        output_file = args.output or "nginx_site.conf"
-        generator.save_config(config_text, output_file, "text")
-        
-    elif args.config_type == "docker":
-        config = generator.generate_docker_compose()
-        output_file = args.output or "docker-compose.yml"
-        with open(generator.work_dir / output_file, 'w') as f:
-            import yaml
-            yaml.dump(config, f, default_flow_style=False)
-        logger.info(f"Docker Compose配置已保存: {output_file}")
-        
-    elif args.config_type == "workflow":
-        config = generator.generate_comfyui_workflow(args.workflow_type)
-        output_file = args.output or f"workflow_{args.workflow_type}.json"
-        generator.save_config(config, output_file, "json")
+    # 根据类型生成配置，任一配置写入失败时最终以非零状态退出
+    failed = []
+    for config_type in config_types:
+        if config_type == "supervisor":
+            config_text = generator.generate_supervisor_ini()
+            output_file = args.output or "supervisord.conf"
+            ok = generator.save_config(config_text, output_file, "text")
+            
+        elif config_type == "nginx":
+            config_text = generator.generate_nginx_config(args.domain)
+            output_file = args.output or "nginx_site.conf"
+            ok = generator.save_config(config_text, output_file, "text")
+            
+        elif config_type == "docker":
+            config_text = generator.generate_docker_compose_yaml()
+            output_file = args.output or "docker-compose.yml"
+            ok = generator.save_config(config_text, output_file, "text")
+            
+        elif config_type == "workflow":
+            blob = generator.generate_workflow_json_bytes(args.workflow_type)
+            output_file = args.output or f"workflow_{args.workflow_type}.json"
+            ok = generator.save_bytes(blob, output_file)
+            
+        elif config_type == "optimization":
+            config = generator.optimize_for_gpu_memory()
+            output_file = args.output or "gpu_optimization.json"
+            ok = generator.save_config(config, output_file, "json")
         
-    elif args.config_type == "optimization":
-        config = generator.optimize_for_gpu_memory()
-        output_file = args.output or "gpu_optimization.json"
-        generator.save_config(config, output_file, "json")
+        if ok:
+            print(f"✅ {config_type} 配置生成完成")
+        else:
+            failed.append(config_type)
     
-    print(f"✅ {args.config_type} 配置生成完成")
+    if failed:
+        print(f"❌ 以下配置生成失败: {', '.join(failed)}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()